@@ -1,8 +1,8 @@
 """Command-line interface for the MBOX processor."""
-import argparse
 import logging
 import sys
 from pathlib import Path
+from types import SimpleNamespace
 from typing import Optional, List
 
 from . import __version__
@@ -10,15 +10,40 @@ from .config import Config
 from .processors import MboxProcessor
 from .utils.logging_utils import setup_logging
 
-def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
-    """Parse command-line arguments.
-    
-    Args:
-        args: List of command-line arguments (default: sys.argv[1:])
-        
-    Returns:
-        Parsed arguments
-    """
+# Option tables for the fast-path parser. Boolean flags map option string
+# to destination; valued options additionally consume the next argument
+# (or the text after '=').
+_FLAG_OPTS = {
+    '-v': 'verbose', '--verbose': 'verbose',
+    '--Pp': 'post_process', '--post-process': 'post_process',
+    '--keep-temp': 'keep_temp',
+    '--metadata-only': 'metadata_only',
+    '--streaming': 'streaming',
+}
+_VALUE_OPTS = {
+    '-o': 'output_dir', '--output-dir': 'output_dir',
+    '--output-mbox': 'output_mbox',
+    '-m': 'max_messages', '--max-messages': 'max_messages',
+    '-w': 'workers', '--workers': 'workers',
+    '--log-file': 'log_file',
+}
+_DEFAULTS = {
+    'output_dir': 'attachments',
+    'output_mbox': 'output.mbox',
+    'max_messages': 0,
+    'workers': 0,
+    'verbose': False,
+    'log_file': 'mbox_processor.log',
+    'post_process': False,
+    'keep_temp': False,
+    'metadata_only': False,
+    'streaming': False,
+}
+
+def _build_parser():
+    """Build the full argparse parser (used for --help/--version/errors)."""
+    import argparse
+
     parser = argparse.ArgumentParser(
         description='Process MBOX files from Google Takeout',
         formatter_class=argparse.ArgumentDefaultsHelpFormatter
@@ -53,6 +78,13 @@ def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
         help='Maximum number of messages to process (0 for all)'
     )
     
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=0,
+        help='Number of worker processes (0 for one per CPU, 1 for serial)'
+    )
+
     parser.add_argument(
         '-v', '--verbose',
         action='store_true',
@@ -73,19 +105,79 @@ def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
     )
     
     parser.add_argument(
-        '--Pp',
+        '--Pp', '--post-process',
         action='store_true',
         help='Enable post-processing of files without extensions to detect file types and add appropriate extensions',
         dest='post_process'
     )
     
+    parser.add_argument(
+        '--metadata-only',
+        action='store_true',
+        help='Collect attachment metadata (sender/date/size/type) without decoding or saving payloads'
+    )
+
+    parser.add_argument(
+        '--streaming',
+        action='store_true',
+        help='Process one message at a time and drop payloads immediately to bound peak memory'
+    )
+
     parser.add_argument(
         '--keep-temp',
         action='store_true',
         help='Keep temporary directory after processing (useful for debugging)'
     )
-    
-    return parser.parse_args(args)
+
+    return parser
+
+def parse_args(args: Optional[List[str]] = None) -> SimpleNamespace:
+    """Parse command-line arguments.
+
+    Args:
+        args: List of command-line arguments (default: sys.argv[1:])
+
+    Returns:
+        Parsed arguments
+
+    A small hand-rolled walk handles the common invocation so the CLI
+    doesn't pay argparse's import and parser-construction cost on every
+    run; argparse is still used for --help, --version and error messages.
+    """
+    if args is None:
+        args = sys.argv[1:]
+
+    if '-h' in args or '--help' in args or '--version' in args:
+        return SimpleNamespace(**vars(_build_parser().parse_args(args)))
+
+    ns = SimpleNamespace(input_file=None, **_DEFAULTS)
+    i = 0
+    try:
+        while i < len(args):
+            arg = args[i]
+            opt, _, inline_value = arg.partition('=')
+            if opt in _FLAG_OPTS and not inline_value:
+                setattr(ns, _FLAG_OPTS[opt], True)
+            elif opt in _VALUE_OPTS:
+                value = inline_value if inline_value else args[i + 1]
+                if not inline_value:
+                    i += 1
+                if _VALUE_OPTS[opt] in ('max_messages', 'workers'):
+                    value = int(value)
+                setattr(ns, _VALUE_OPTS[opt], value)
+            elif not arg.startswith('-') and ns.input_file is None:
+                ns.input_file = arg
+            else:
+                raise ValueError(arg)
+            i += 1
+        if ns.input_file is None:
+            raise ValueError('input_file')
+    except (ValueError, IndexError):
+        # Unknown option, missing value/positional, or a bad integer —
+        # let argparse produce its usual diagnostics and exit code.
+        return SimpleNamespace(**vars(_build_parser().parse_args(args)))
+
+    return ns
 
 def main() -> int:
     """Main entry point for the CLI.
@@ -112,7 +204,10 @@ def main() -> int:
             max_messages=args.max_messages,
             verbose=args.verbose,
             post_process=args.post_process,
-            keep_temp=args.keep_temp
+            keep_temp=args.keep_temp,
+            metadata_only=args.metadata_only,
+            streaming=args.streaming,
+            workers=args.workers
         )
         
         try:
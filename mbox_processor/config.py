@@ -14,9 +14,12 @@ class Config:
         verbose: bool = False,
         post_process: bool = False,
         keep_temp: bool = False,
+        metadata_only: bool = False,
+        streaming: bool = False,
+        workers: Optional[int] = None,
     ):
         """Initialize configuration.
-        
+
         Args:
             input_file: Path to the input MBOX file
             output_dir: Directory to save extracted attachments
@@ -25,6 +28,9 @@ class Config:
             verbose: Enable verbose output
             post_process: Enable post-processing of files without extensions
             keep_temp: Keep temporary directory after processing
+            metadata_only: Collect attachment metadata without decoding or saving payloads
+            streaming: Process one message at a time, dropping payloads immediately
+            workers: Number of worker processes (0 for one per CPU, 1 for serial)
         """
         self.input_file = Path(input_file).resolve()
         self.output_dir = Path(output_dir).resolve()
@@ -33,20 +39,14 @@ class Config:
         self.verbose = bool(verbose)
         self.post_process = bool(post_process)
         self.keep_temp = bool(keep_temp)
+        self.metadata_only = bool(metadata_only)
+        self.streaming = bool(streaming)
+        self.workers = max(0, int(workers)) if workers else 0
 
-    @property
-    def attachments_dir(self) -> Path:
-        """Get the absolute path to the attachments directory.
-        
-        Returns:
-            Path to the attachments directory under the output directory
-        """
-        return self.output_dir / "attachments"
-        
-    @property
-    def temp_dir(self) -> Path:
-        """Get the absolute path to the temporary directory for post-processing."""
-        return self.output_dir / "temp"
+        # Derived paths, computed once rather than rebuilt by properties on
+        # every access in per-attachment hot paths.
+        self.attachments_dir = self.output_dir / "attachments"
+        self.temp_dir = self.output_dir / "temp"
 
     def validate(self) -> None:
         """Validate the configuration.
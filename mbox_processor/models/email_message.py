@@ -2,10 +2,12 @@
 from dataclasses import dataclass, field
 from datetime import datetime
 from email.message import Message
+from email.utils import parseaddr
+from functools import cached_property
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence
 
-from ..models.attachment import Attachment
+from ..models.attachment import Attachment, _SANITIZE_TABLE
 
 @dataclass
 class EmailMessage:
@@ -17,8 +19,7 @@ class EmailMessage:
     to_addrs: List[str]
     subject: str
     date: datetime
-    raw_message: str
-    
+
     # Optional fields
     cc_addrs: List[str] = field(default_factory=list)
     bcc_addrs: List[str] = field(default_factory=list)
@@ -32,31 +33,50 @@ class EmailMessage:
     # Attachments
     attachments: List[Attachment] = field(default_factory=list)
     
-    # Google-specific headers
-    gmail_labels: List[str] = field(default_factory=list)
+    # Google-specific headers. A Sequence so label-less messages can share
+    # one empty tuple instead of each allocating a list.
+    gmail_labels: Sequence[str] = ()
     gmail_thread_id: Optional[str] = None
     
     # Processing metadata
     processed: bool = False
     error: Optional[str] = None
     
-    @property
+    @cached_property
+    def _parsed_from(self) -> tuple:
+        """Parse the From field once; reused by sender_name."""
+        return parseaddr(self.from_addr)
+
+    @cached_property
     def sender_email(self) -> str:
         """Extract the email address from the From field."""
-        # Handle cases like "John Doe <john@example.com>"
-        if '<' in self.from_addr and '>' in self.from_addr:
-            return self.from_addr.split('<')[-1].split('>')[0].strip()
-        return self.from_addr.strip()
-    
-    @property
+        # Single index-based slice: no intermediate split lists, and no
+        # parseaddr machinery for the overwhelmingly common angle form.
+        s = self.from_addr
+        l = s.find('<')
+        if l >= 0:
+            r = s.find('>', l + 1)
+            if r > 0:
+                return s[l + 1:r].strip()
+        return s.strip()
+
+    @cached_property
+    def safe_sender(self) -> str:
+        """Sanitized sender address used in attachment filenames.
+
+        Computed once per message so a message with K attachments doesn't
+        re-sanitize the same address K times.
+        """
+        return self.sender_email.translate(_SANITIZE_TABLE).lower()
+
+    @cached_property
     def sender_name(self) -> str:
         """Extract the sender's name if available, otherwise return email local part."""
-        if '<' in self.from_addr and '>' in self.from_addr:
-            name_part = self.from_addr.split('<')[0].strip()
-            if name_part:
-                # Remove surrounding quotes if present
-                return name_part.strip('\"\'')
-        
+        name = self._parsed_from[0]
+        if name:
+            # Remove surrounding quotes if present
+            return name.strip('\"\'')
+
         # If no name, use local part of email
         email = self.sender_email
         return email.split('@')[0] if '@' in email else email
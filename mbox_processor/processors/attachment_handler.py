@@ -1,32 +1,110 @@
 """Handles saving and managing email attachments."""
 import logging
 import os
-import re
-import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parseaddr
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from ..models.attachment import Attachment
 from ..models.email_message import EmailMessage
-from ..utils.file_utils import ensure_directory, process_extensionless_files
+from ..utils.file_utils import process_extensionless_files
 
 logger = logging.getLogger(__name__)
 
+# Built once: translate() sanitizes in a single pass instead of chained
+# str.replace calls.
+_SANITIZE_TABLE = str.maketrans({'@': '_', '.': '_', '+': '_'})
+
+@lru_cache(maxsize=1024)
+def _safe_dir_name(sender_email: str) -> str:
+    """Sanitized directory name for a sender address.
+
+    Memoized because consecutive messages frequently share a sender, so
+    repeats skip both the address parse and the translate pass.
+    """
+    _, addr = parseaddr(sender_email)
+    return (addr or sender_email).translate(_SANITIZE_TABLE).lower()
+
+def _fast_rmtree(root) -> None:
+    """Remove a directory tree with direct os calls.
+
+    shutil.rmtree routes every entry through several Python-level layers;
+    for a temp directory holding thousands of extensionless attachments a
+    plain scandir walk with os.unlink/os.rmdir is markedly cheaper. Errors
+    are ignored, matching the previous rmtree(ignore_errors=True) call.
+    """
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    _fast_rmtree(entry.path)
+                else:
+                    try:
+                        os.unlink(entry.path)
+                    except OSError:
+                        pass
+        os.rmdir(root)
+    except OSError:
+        pass
+
+def _walk_files(root) -> Iterator[os.DirEntry]:
+    """Yield DirEntry objects for every file under root, depth first.
+
+    os.scandir reuses the file type readdir already returned, so unlike
+    Path.rglob no per-entry Path object or extra stat is needed.
+    """
+    stack = [os.fspath(root)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
 class AttachmentHandler:
     """Handles saving and managing email attachments."""
-    
-    def __init__(self, base_dir: str = "attachments", post_process: bool = False, keep_temp: bool = False):
+
+    # temp_dir is only assigned when post-processing is enabled; the
+    # hasattr checks elsewhere rely on the unset-slot AttributeError.
+    __slots__ = (
+        'base_dir', 'post_process', 'keep_temp', 'metadata_only',
+        'max_workers', '_pool', '_ensured_dirs', 'temp_dir',
+    )
+
+    def __init__(
+        self,
+        base_dir: str = "attachments",
+        post_process: bool = False,
+        keep_temp: bool = False,
+        metadata_only: bool = False,
+        max_workers: Optional[int] = None,
+    ):
         """Initialize the attachment handler.
-        
+
         Args:
             base_dir: Base directory to save attachments
             post_process: Whether to enable post-processing of files without extensions
             keep_temp: Whether to keep the temporary directory after processing
+            metadata_only: Whether to skip writing attachment payloads to disk
+            max_workers: Thread count for parallel saves (default: min(32, 2x cpu count))
         """
         self.base_dir = Path(base_dir).resolve()
         self.post_process = post_process
         self.keep_temp = keep_temp
-        
+        self.metadata_only = metadata_only
+
+        # Sender directories already created this run; consecutive
+        # attachments from one sender skip the repeat mkdir syscall.
+        self._ensured_dirs: set = set()
+
+        # Saves are I/O bound and os.write releases the GIL, so a bounded
+        # thread pool overlaps write latency across attachments.
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 4) * 2)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+
         # Ensure base directories exist
         self.base_dir.mkdir(parents=True, exist_ok=True)
         if self.post_process:
@@ -43,52 +121,101 @@ class AttachmentHandler:
         self,
         message: EmailMessage,
         overwrite: bool = False
-    ) -> List[Path]:
+    ) -> Tuple[Tuple[str, int, str], ...]:
         """Save all attachments from an email message.
-        
+
         Args:
             message: The email message containing attachments
             overwrite: Whether to overwrite existing files
-            
+
         Returns:
-            List of paths to saved attachments
+            Tuple of (path, bytes written, extension) triples, one per
+            saved attachment. The writer already knows the byte count and
+            extension, so callers accumulate size/type stats without a
+            stat() syscall or Path allocation per file. In metadata-only
+            mode nothing is written and the path slot is empty, but the
+            estimated size and extension are still reported so the stats
+            the mode exists for get collected.
         """
-        saved_paths = []
-        
+
+        # Cache the level check once per message; the per-attachment debug
+        # calls below would otherwise pay an isEnabledFor lookup and
+        # argument-tuple build 100k+ times on large mailboxes.
+        debug = logger.isEnabledFor(logging.DEBUG)
+
         if not message.attachments:
-            logger.debug("No attachments to save for message: %s", message.message_id)
-            return saved_paths
-        
-        logger.info("Saving %d attachments for message: %s", 
+            if debug:
+                logger.debug("No attachments to save for message: %s", message.message_id)
+            return ()
+
+        if self.metadata_only:
+            if debug:
+                logger.debug("Metadata-only mode: skipping %d attachment saves for message: %s",
+                            len(message.attachments), message.message_id)
+            return tuple(
+                ('', attachment.size, attachment.extension)
+                for attachment in message.attachments
+            )
+
+        logger.info("Saving %d attachments for message: %s",
                    len(message.attachments), message.message_id)
-        
-        # Ensure the base directory exists
-        self.base_dir.mkdir(parents=True, exist_ok=True)
-        
+
+        # Set message context and resolve directories on this thread (mkdir
+        # included), then fan the actual writes out to the pool so the I/O
+        # latencies overlap.
+        message_id = message.message_id
+        email_date = message.date
+        sender = message.from_addr
+        safe_sender = message.safe_sender
+        save_dir = self.get_attachment_dir(sender)
+
         for attachment in message.attachments:
+            attachment.message_id = message_id
+            attachment.email_date = email_date
+            attachment.sender_email = sender
+            attachment.safe_sender = safe_sender
+
+        # Single-attachment messages skip the pool; the submit/as_completed
+        # round trip costs more than it buys with nothing to overlap.
+        if len(message.attachments) == 1:
+            attachment = message.attachments[0]
             try:
-                # Set message context on attachment
-                attachment.message_id = message.message_id
-                attachment.email_date = message.date
-                attachment.sender_email = message.from_addr
-                
-                # Get the save directory for this sender
-                save_dir = self.get_attachment_dir(attachment.sender_email)
-                
-                # Save the attachment to the sender's directory
                 saved_path = attachment.save(save_dir)
-                saved_paths.append(saved_path)
-                logger.debug("Saved attachment: %s -> %s", 
+            except Exception as e:
+                logger.error("Failed to save attachment %s: %s",
+                           attachment.filename or 'unknown', str(e),
+                           exc_info=True)
+                return ()
+            if debug:
+                logger.debug("Saved attachment: %s -> %s",
                             attachment.filename, saved_path)
-                
+            return ((str(saved_path), attachment.size, attachment.extension),)
+
+        futures = {}
+        for attachment in message.attachments:
+            futures[self._pool.submit(attachment.save, save_dir)] = attachment
+
+        # Pre-sized slots instead of append-driven list growth; failed saves
+        # leave gaps that are dropped from the returned tuple.
+        saved_paths = [None] * len(futures)
+        idx = 0
+        for future in as_completed(futures):
+            attachment = futures[future]
+            try:
+                saved_path = future.result()
+                saved_paths[idx] = (str(saved_path), attachment.size, attachment.extension)
+                idx += 1
+                if debug:
+                    logger.debug("Saved attachment: %s -> %s",
+                                attachment.filename, saved_path)
             except Exception as e:
-                logger.error("Failed to save attachment %s: %s", 
-                           getattr(attachment, 'filename', 'unknown'), str(e),
+                logger.error("Failed to save attachment %s: %s",
+                           attachment.filename or 'unknown', str(e),
                            exc_info=True)
                 # Continue with next attachment even if one fails
                 continue
-        
-        return saved_paths
+
+        return tuple(saved_paths[:idx])
         
     def post_process_attachments(self) -> Dict[str, str]:
         """Process files without extensions to detect their types and add extensions.
@@ -105,20 +232,23 @@ class AttachmentHandler:
         
         # Log contents of temp directory before processing
         if logger.isEnabledFor(logging.DEBUG):
-            temp_files = list(self.temp_dir.rglob('*'))
-            logger.debug("Found %d files in temp directory before processing", len(temp_files))
-            for f in temp_files:
-                logger.debug("  - %s (size: %d bytes)", f, f.stat().st_size if f.is_file() else 0)
+            count = 0
+            for entry in _walk_files(self.temp_dir):
+                logger.debug("  - %s (size: %d bytes)", entry.path, entry.stat().st_size)
+                count += 1
+            logger.debug("Found %d files in temp directory before processing", count)
         
         # Process the files
         processed = process_extensionless_files(self.temp_dir, self.base_dir)
         
-        # Log processing results
-        logger.info(
-            "Post-processing complete. Processed %d files, %d successfully",
-            len(processed) + len(self._get_remaining_temp_files()),
-            len(processed)
-        )
+        # Log processing results; the remaining-file count costs a temp-dir
+        # walk, so only pay it if the message will actually be emitted.
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Post-processing complete. Processed %d files, %d successfully",
+                len(processed) + self._count_remaining_temp_files(),
+                len(processed)
+            )
         
         # Clean up temp directory if not keeping it
         if not self.keep_temp:
@@ -128,11 +258,15 @@ class AttachmentHandler:
             
         return processed
     
-    def _get_remaining_temp_files(self) -> list:
-        """Get list of files remaining in temp directory."""
+    def _count_remaining_temp_files(self) -> int:
+        """Count files remaining in the temp directory.
+
+        A pure count — no Path objects are materialized for entries that
+        are only being tallied.
+        """
         if not hasattr(self, 'temp_dir') or not self.temp_dir.exists():
-            return []
-        return [f for f in self.temp_dir.rglob('*') if f.is_file()]
+            return 0
+        return sum(1 for _ in _walk_files(self.temp_dir))
     
     def _cleanup_temp_dir(self) -> None:
         """Clean up the temporary directory."""
@@ -141,7 +275,7 @@ class AttachmentHandler:
             
         try:
             logger.debug("Cleaning up temp directory: %s", self.temp_dir)
-            shutil.rmtree(self.temp_dir, ignore_errors=True)
+            _fast_rmtree(self.temp_dir)
         except Exception as e:
             logger.warning("Failed to clean up temp directory %s: %s", self.temp_dir, e)
         else:
@@ -156,47 +290,49 @@ class AttachmentHandler:
         Returns:
             Path to the sender's attachment directory under base_dir
         """
-        # Extract email from format: "John Doe <john@example.com>"
-        email_match = re.search(r'<([^>]+)>', sender_email)
-        if email_match:
-            sender = email_match.group(1)  # Extract email from <>
-        else:
-            sender = sender_email  # Use as is if no <>
-            
-        # Sanitize sender email for directory name
-        safe_email = (
-            sender
-            .replace('@', '_')
-            .replace('.', '_')
-            .replace('+', '_')
-            .lower()
-        )
-            
-        # Create sender's directory directly under base_dir
-        sender_dir = self.base_dir / safe_email
-        sender_dir.mkdir(parents=True, exist_ok=True)
-            
+        # Create sender's directory directly under base_dir, once per run
+        sender_dir = self._compute_sender_dir(sender_email)
+        if sender_dir not in self._ensured_dirs:
+            sender_dir.mkdir(parents=True, exist_ok=True)
+            self._ensured_dirs.add(sender_dir)
+
         return sender_dir
+
+    def _compute_sender_dir(self, sender_email: str) -> Path:
+        """Derive a sender's directory path without touching the filesystem."""
+        return self.base_dir / _safe_dir_name(sender_email)
     
-    def list_attachments(self, sender_email: Optional[str] = None) -> List[Path]:
+    def list_attachments(self, sender_email: Optional[str] = None) -> Iterator[Path]:
         """List all saved attachments, optionally filtered by sender.
-        
+
         Args:
             sender_email: Optional sender email to filter by
-            
-        Returns:
-            List of paths to attachments
+
+        Yields:
+            Paths to attachments
+
+        Uses os.scandir rather than Path.glob: DirEntry carries the file
+        type from readdir so no extra stat is issued per entry, and Paths
+        are only built for entries actually yielded.
         """
         if sender_email:
-            # List attachments for a specific sender
-            sender_dir = self.get_attachment_dir(sender_email)
-            if not sender_dir.exists():
-                return []
-            return list(sender_dir.glob('*'))
-        
+            # List attachments for a specific sender; a pure path
+            # computation so listing never creates directories.
+            sender_dir = self._compute_sender_dir(sender_email)
+            if not sender_dir.is_dir():
+                return
+            with os.scandir(sender_dir) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False):
+                        yield Path(entry.path)
+            return
+
         # List all attachments from all senders
-        attachments = []
-        for sender_dir in self.base_dir.glob('*'):
-            if sender_dir.is_dir() and sender_dir.name != 'temp':
-                attachments.extend(sender_dir.glob('*'))
-        return attachments
+        with os.scandir(self.base_dir) as sender_dirs:
+            for sender_entry in sender_dirs:
+                if not sender_entry.is_dir(follow_symlinks=False) or sender_entry.name == 'temp':
+                    continue
+                with os.scandir(sender_entry.path) as entries:
+                    for entry in entries:
+                        if entry.is_file(follow_symlinks=False):
+                            yield Path(entry.path)
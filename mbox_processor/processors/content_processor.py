@@ -1,36 +1,145 @@
 """Handles processing and converting email content."""
 import logging
 import re
+from collections.abc import Mapping
 from email import policy
-from email.parser import BytesParser
+from email.parser import BytesHeaderParser, BytesParser
 from typing import Optional, Tuple
 
 from bs4 import BeautifulSoup
 
+from ..models.attachment import Attachment
+
+# Prefer C-backed HTML parsers when available: selectolax (Lexbor) is an
+# order of magnitude faster than html.parser on typical email HTML, and
+# lxml sits in between. Both are optional; the stdlib parser remains the
+# floor.
+try:
+    from selectolax.parser import HTMLParser as _SelectolaxParser
+except ImportError:
+    _SelectolaxParser = None
+
+try:
+    import lxml  # noqa: F401
+    _BS4_PARSER = 'lxml'
+except ImportError:
+    _BS4_PARSER = 'html.parser'
+
 logger = logging.getLogger(__name__)
 
+# Compiled once for the four header fields parsed per message. When the
+# optional google-re2 binding is installed its DFA engine gives guaranteed
+# linear scans (RE2 has no lookbehind, nor needs one); the stdlib fallback
+# keeps the negative lookbehind so unanchored matches stay linear there too.
+_EMAIL_PATTERN = r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}'
+try:
+    import re2 as _re2
+    _EMAIL_RE = _re2.compile(_EMAIL_PATTERN)
+except ImportError:
+    _EMAIL_RE = re.compile(r'(?<![A-Za-z0-9._%+-])' + _EMAIL_PATTERN)
+
+# Strips markup from near-plain-text "HTML" parts without a full parse.
+_TAG_RE = re.compile(r'<[^>]+>')
+
+# How far into a message peek_headers looks for the end of the header
+# block; headers longer than this fall back to a full parse.
+_HEADER_PROBE = 64 * 1024
+
+class _LazyHeaders(Mapping):
+    """Read-only mapping over a message's headers, materialized on demand.
+
+    process_message used to snapshot every header into a dict for every
+    message; most callers only look up one or two keys, so single lookups
+    go straight to the message and the full dict is only built if the
+    caller actually iterates.
+    """
+
+    __slots__ = ('_msg', '_cache')
+
+    def __init__(self, msg):
+        self._msg = msg
+        self._cache = None
+
+    def _full(self) -> dict:
+        if self._cache is None:
+            self._cache = dict(self._msg.items())
+        return self._cache
+
+    def __getitem__(self, key):
+        if self._cache is not None:
+            return self._cache[key]
+        value = self._msg[key]
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        if self._cache is not None:
+            return key in self._cache
+        return key in self._msg
+
+    def __iter__(self):
+        return iter(self._full())
+
+    def __len__(self):
+        return len(self._full())
+
 class ContentProcessor:
     """Handles processing and converting email content."""
     
-    def __init__(self, keep_html: bool = False):
+    def __init__(self, keep_html: bool = False, metadata_only: bool = False):
         """Initialize the content processor.
-        
+
         Args:
             keep_html: Whether to keep HTML content in addition to plain text
+            metadata_only: Whether to skip decoding attachment payloads
         """
         self.keep_html = keep_html
+        self.metadata_only = metadata_only
         self.parser = BytesParser(policy=policy.default)
+        self.header_parser = BytesHeaderParser(policy=policy.default)
+
+    def peek_headers(self, raw_message):
+        """Parse only a message's header block.
+
+        Args:
+            raw_message: Raw email message bytes (bytes or a memoryview)
+
+        Returns:
+            A header-only Message, or None if the end of the header block
+            wasn't found within the probe window (caller should fall back
+            to a full parse).
+
+        Copies at most _HEADER_PROBE bytes out of the message and never
+        touches the body, so callers can inspect Content-Type or From
+        without paying for a MIME-tree parse of multi-MB messages.
+        """
+        head = bytes(raw_message[:_HEADER_PROBE])
+        # The header block ends at the first blank line, in either
+        # line-ending convention.
+        end = head.find(b'\n\n')
+        crlf_end = head.find(b'\r\n\r\n')
+        if crlf_end != -1 and (end == -1 or crlf_end < end):
+            end = crlf_end
+        if end == -1:
+            return None
+        return self.header_parser.parsebytes(head[:end + 1])
     
-    def process_message(self, raw_message: bytes) -> dict:
+    def process_message(self, raw_message) -> dict:
         """Process a raw email message.
-        
+
         Args:
-            raw_message: Raw email message bytes
-            
+            raw_message: Raw email message bytes (bytes or a memoryview,
+                e.g. a slice of the mbox mmap)
+
         Returns:
             Dictionary containing processed content
         """
         try:
+            # BytesParser needs a real bytes object; the copy made here is
+            # one message wide and is dropped as soon as parsing finishes.
+            if isinstance(raw_message, memoryview):
+                raw_message = bytes(raw_message)
             msg = self.parser.parsebytes(raw_message)
             
             # Extract basic information
@@ -60,112 +169,197 @@ class ContentProcessor:
                 'text_content': text_content,
                 'html_content': html_content if self.keep_html else None,
                 'attachments': attachments,
-                'headers': dict(msg.items())
+                'headers': _LazyHeaders(msg)
             }
             
         except Exception as e:
             logger.error("Error processing message: %s", str(e), exc_info=True)
             raise
     
-    def _extract_content(
-        self, 
-        msg, 
-        text_parts: Optional[list] = None,
-        html_parts: Optional[list] = None,
-        attachments: Optional[list] = None
-    ) -> Tuple[Optional[str], Optional[str], list]:
-        """Recursively extract content and attachments from a message."""
-        if text_parts is None:
-            text_parts = []
-        if html_parts is None:
-            html_parts = []
-        if attachments is None:
-            attachments = []
-        
-        content_type = msg.get_content_type()
-        
-        # Handle multipart messages
-        if msg.is_multipart():
-            for part in msg.iter_parts():
-                self._extract_content(part, text_parts, html_parts, attachments)
-            return (
-                '\n\n'.join(text_parts) if text_parts else None,
-                '\n'.join(html_parts) if html_parts else None,
-                attachments
-            )
-        
-        # Handle attachments
-        content_disposition = msg.get_content_disposition()
-        if content_disposition and content_disposition.lower() in ('attachment', 'inline'):
+    def _extract_content(self, msg) -> Tuple[Optional[str], Optional[str], list]:
+        """Extract content and attachments from a message in one flat pass.
+
+        Uses msg.walk() instead of explicit recursion: the old recursive
+        version re-joined the accumulated text at every multipart level even
+        though only the root result was used, which is quadratic on deeply
+        nested multipart messages.
+        """
+        text_parts = []
+        html_parts = []
+        attachments = []
+
+        # Content-type dispatch: body parts land in exactly one of these
+        # sinks, and anything else (undisposed images, calendar parts, ...)
+        # is skipped before its payload is ever decoded.
+        sinks = {'text/plain': text_parts, 'text/html': html_parts}
+
+        for part in msg.walk():
+            # Containers carry no content of their own
+            if part.is_multipart():
+                continue
+
+            content_type = part.get_content_type()
+
+            # Handle attachments
+            content_disposition = part.get_content_disposition()
+            if content_disposition and content_disposition.lower() in ('attachment', 'inline'):
+                try:
+                    self._collect_attachment(part, content_type, content_disposition, attachments)
+                except Exception as e:
+                    logger.error("Error processing attachment: %s", str(e))
+                continue
+
+            # Handle text content
+            sink = sinks.get(content_type)
+            if sink is None:
+                continue
+
+            payload = part.get_payload(decode=True)
+            if not payload:
+                continue
+
             try:
-                filename = msg.get_filename() or f'attachment_{len(attachments) + 1}'
-                payload = msg.get_payload(decode=True)
-                
-                if payload:
-                    attachments.append({
-                        'filename': filename,
-                        'content_type': content_type,
-                        'content_disposition': content_disposition,
-                        'payload': payload,
-                        'size': len(payload)
-                    })
-                return None, None, attachments
+                charset = part.get_content_charset() or 'utf-8'
+                sink.append(payload.decode(charset, errors='replace'))
             except Exception as e:
-                logger.error("Error processing attachment: %s", str(e))
-                return None, None, attachments
-        
-        # Handle text content
-        payload = msg.get_payload(decode=True)
-        if not payload:
-            return None, None, attachments
-        
-        try:
-            charset = msg.get_content_charset() or 'utf-8'
-            content = payload.decode(charset, errors='replace')
-            
-            if content_type == 'text/plain':
-                text_parts.append(content)
-            elif content_type == 'text/html':
-                html_parts.append(content)
-                
-        except Exception as e:
-            logger.error("Error decoding content: %s", str(e))
-        
-        return None, None, attachments
+                logger.error("Error decoding content: %s", str(e))
+
+        return (
+            '\n\n'.join(text_parts) if text_parts else None,
+            '\n'.join(html_parts) if html_parts else None,
+            attachments
+        )
+
+    def _collect_attachment(
+        self,
+        part,
+        content_type: str,
+        content_disposition: str,
+        attachments: list
+    ) -> None:
+        """Append the Attachment for a leaf part to the accumulator.
+
+        Attachments are built as slotted Attachment instances directly
+        rather than intermediate dicts — one allocation per attachment
+        instead of a dict that MboxProcessor immediately re-packed. The
+        message-level fields (sender, date, message id) are filled in by
+        the caller once the whole message is parsed.
+        """
+        filename = part.get_filename() or f'attachment_{len(attachments) + 1}'
+
+        if self.metadata_only:
+            # Skip the base64 decode entirely; estimate the decoded
+            # size from the encoded payload instead.
+            raw = part.get_payload(decode=False) or ''
+            cte = (part.get('Content-Transfer-Encoding') or '').lower()
+            size = (len(raw) * 3) // 4 if cte == 'base64' else len(raw)
+            attachments.append(Attachment.acquire(
+                content_id='',
+                filename=filename,
+                content_type=content_type,
+                content_disposition=content_disposition,
+                payload=None,
+                size=size
+            ))
+            return
+
+        cte = (part.get('Content-Transfer-Encoding') or '').lower()
+        if cte == 'base64':
+            # Defer the decode: keep the encoded bytes and let
+            # Attachment.save stream-decode them, so the decoded copy
+            # never sits in memory alongside the encoded one. The
+            # decoded size follows exactly from the encoded length.
+            raw = (part.get_payload(decode=False) or '').encode('ascii', 'ignore')
+            clean_len = len(raw) - raw.count(b'\n') - raw.count(b'\r')
+            size = (clean_len // 4) * 3 - raw.count(b'=')
+            if size > 0:
+                attachments.append(Attachment.acquire(
+                    content_id='',
+                    filename=filename,
+                    content_type=content_type,
+                    content_disposition=content_disposition,
+                    payload=raw,
+                    size=size,
+                    encoding='base64'
+                ))
+            return
+
+        if cte == 'quoted-printable':
+            # Same deferral as base64: hold the encoded text and decode at
+            # save time. The decoded size can't be known without decoding,
+            # so the encoded length stands in as an upper bound.
+            raw = (part.get_payload(decode=False) or '').encode('ascii', 'ignore')
+            if raw:
+                attachments.append(Attachment.acquire(
+                    content_id='',
+                    filename=filename,
+                    content_type=content_type,
+                    content_disposition=content_disposition,
+                    payload=raw,
+                    size=len(raw),
+                    encoding='quoted-printable'
+                ))
+            return
+
+        payload = part.get_payload(decode=True)
+
+        if payload:
+            attachments.append(Attachment.acquire(
+                content_id='',
+                filename=filename,
+                content_type=content_type,
+                content_disposition=content_disposition,
+                payload=payload,
+                size=len(payload)
+            ))
     
     @staticmethod
     def _parse_addresses(addresses: str) -> list:
         """Parse email addresses from a header."""
         if not addresses:
             return []
-        
-        # Simple regex to extract email addresses
-        # This is a simplified version and might need improvement
-        email_regex = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-        return re.findall(email_regex, addresses)
+
+        return _EMAIL_RE.findall(addresses)
     
     @staticmethod
     def _html_to_text(html: str) -> str:
         """Convert HTML to plain text."""
+        # Many clients label plain text as text/html; skip the parser
+        # entirely when there is no markup, and use a cheap regex strip for
+        # parts with only a handful of simple tags. Script/style parts need
+        # their content removed, so those still go through a real parser.
+        if '<' not in html:
+            return html.strip()
+        lowered = html.lower()
+        if html.count('<') < 8 and '<script' not in lowered and '<style' not in lowered:
+            return _TAG_RE.sub('', html).strip()
+
         try:
-            # Parse HTML with BeautifulSoup
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # Get text
-            text = soup.get_text()
-            
+            if _SelectolaxParser is not None:
+                tree = _SelectolaxParser(html)
+                for tag in tree.css('script,style'):
+                    tag.decompose()
+                body = tree.body
+                text = body.text(separator='\n') if body is not None else tree.root.text(separator='\n')
+            else:
+                # Parse HTML with BeautifulSoup (lxml backend when installed)
+                soup = BeautifulSoup(html, _BS4_PARSER)
+
+                # Remove script and style elements
+                for script in soup(["script", "style"]):
+                    script.decompose()
+
+                # Get text
+                text = soup.get_text()
+
             # Clean up whitespace
             lines = (line.strip() for line in text.splitlines())
             chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
             text = '\n'.join(chunk for chunk in chunks if chunk)
-            
+
             return text
-            
+
         except Exception as e:
             logger.error("Error converting HTML to text: %s", str(e))
-            # Fallback to simple regex if BeautifulSoup fails
+            # Fallback to simple regex if parsing fails
             return re.sub(r'<[^>]+>', '', html)
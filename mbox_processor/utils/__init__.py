@@ -4,6 +4,7 @@ from .file_utils import (
     sanitize_filename,
     ensure_directory,
     get_file_hash,
+    get_file_hashes,
     get_file_size
 )
 from .logging_utils import setup_logging
@@ -17,6 +18,7 @@ __all__ = [
     'sanitize_filename',
     'ensure_directory',
     'get_file_hash',
+    'get_file_hashes',
     'get_file_size',
     'setup_logging',
     'get_safe_filename',
@@ -1,11 +1,24 @@
 """Logging configuration for the MBOX processor."""
+import atexit
 import logging
 import logging.handlers
 import os
+import queue
 import sys
 from pathlib import Path
 from typing import Optional
 
+# Listener thread started by setup_logging; kept module-global so repeat
+# setup_logging calls can stop the previous one.
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+def _stop_listener() -> None:
+    """Stop the active listener, flushing queued records. Idempotent."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
 def setup_logging(
     log_file: Optional[str] = None,
     log_level: int = logging.INFO,
@@ -17,7 +30,13 @@ def setup_logging(
         log_file: Path to the log file (optional)
         log_level: Logging level (default: INFO)
         console: Whether to log to console (default: True)
+
+    Records are routed through a QueueHandler to a background
+    QueueListener that owns the real console/file handlers, so
+    formatting and handler I/O (terminal writes, file rotation) happen
+    off the processing thread; an emit is just a queue put.
     """
+    global _queue_listener
     # Create formatters
     console_formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -30,22 +49,23 @@ def setup_logging(
     # Configure root logger
     logger = logging.getLogger()
     logger.setLevel(log_level)
-    
-    # Clear existing handlers
+
+    # Clear existing handlers and stop any previous listener
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
-    
-    # Add console handler
+    _stop_listener()
+
+    # Real handlers, owned by the listener thread rather than the root logger
+    handlers = []
     if console:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setFormatter(console_formatter)
-        logger.addHandler(console_handler)
-    
-    # Add file handler if log file is specified
+        handlers.append(console_handler)
+
     if log_file:
         log_path = Path(log_file)
         log_path.parent.mkdir(parents=True, exist_ok=True)
-        
+
         file_handler = logging.handlers.RotatingFileHandler(
             log_path,
             maxBytes=10 * 1024 * 1024,  # 10 MB
@@ -53,8 +73,18 @@ def setup_logging(
             encoding='utf-8'
         )
         file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
-    
+        handlers.append(file_handler)
+
+    if handlers:
+        log_queue: queue.Queue = queue.Queue(-1)
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        _queue_listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        _queue_listener.start()
+        # Flush queued records before interpreter teardown
+        atexit.register(_stop_listener)
+
     # Set log level for external libraries
     logging.getLogger('urllib3').setLevel(logging.WARNING)
     logging.getLogger('requests').setLevel(logging.WARNING)
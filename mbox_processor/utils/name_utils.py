@@ -1,7 +1,18 @@
 """Name and email utility functions for the MBOX processor."""
+import os
 import re
 from typing import Optional, Tuple
 
+from .file_utils import sanitize_filename
+
+# Hoisted to module scope: per-call re.sub/re.match with string patterns
+# pays a pattern hash + cache lookup each time even when the compiled
+# regex is cached. The invalid-character strip uses a translate table,
+# as in file_utils.sanitize_filename — one C-level pass, no regex at all.
+_INVALID_TABLE = str.maketrans({c: '_' for c in '\\/*?:"<>|'})
+_NAME_ADDR_RE = re.compile(r'^\s*(.*?)\s*<([^>]+)>\s*$')
+_EMAIL_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
 def get_safe_filename(
     original_name: str,
     prefix: str = "",
@@ -19,23 +30,22 @@ def get_safe_filename(
     Returns:
         Safe filename with prefix and suffix
     """
-    # Remove directory path if present
-    name = original_name.split('/')[-1].split('\\')[-1]
-    
+    # Remove directory path if present. basename handles both separators
+    # in one pass once backslashes are normalized, replacing the two
+    # split()-built lists the old code threw away.
+    name = os.path.basename(original_name.replace('\\', '/'))
+
+    # No prefix/suffix (the common call): nothing to assemble around the
+    # extension, so the single-pass sanitizer does the whole job.
+    if not prefix and not suffix:
+        return sanitize_filename(name, max_length)
+
     # Split into name and extension
-    name_parts = name.rsplit('.', 1)
-    if len(name_parts) == 2 and name_parts[1]:
-        base_name, ext = name_parts
-        ext = f".{ext}"
-    else:
-        base_name = name_parts[0]
-        ext = ""
-    
-    # Apply prefix and suffix
-    safe_name = f"{prefix}{base_name}{suffix}{ext}"
-    
-    # Remove invalid characters
-    safe_name = re.sub(r'[\\/*?:"<>|]', '_', safe_name)
+    base_name, ext = os.path.splitext(name)
+
+    # Apply prefix and suffix, then strip invalid characters in a single
+    # translate pass over the assembled name.
+    safe_name = f"{prefix}{base_name}{suffix}{ext}".translate(_INVALID_TABLE)
     
     # Limit length
     if len(safe_name) > max_length:
@@ -61,14 +71,14 @@ def extract_email_address(email_str: str) -> Tuple[Optional[str], Optional[str]]
         return None, None
     
     # Try to match "Name <email@example.com>" format
-    match = re.match(r'^\s*(.*?)\s*<([^>]+)>\s*$', email_str)
+    match = _NAME_ADDR_RE.match(email_str)
     if match:
         name, email = match.groups()
         name = name.strip('"\'').strip() or None
         return name, email.strip()
     
     # Try to match just an email address
-    email_match = re.search(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', email_str)
+    email_match = _EMAIL_RE.search(email_str)
     if email_match:
         return None, email_match.group(0)
     